@@ -3,7 +3,8 @@
 from src.config import config
 from src.state import AgentState, AGENTS, AGENT_DESCRIPTIONS
 from src.graph import workflow, create_graph
-from src.main import run_agent
+from src.main import run_agent, stream_agent
+from src.tools import aclose_clients
 
 __all__ = [
     "config",
@@ -13,4 +14,6 @@ __all__ = [
     "workflow",
     "create_graph",
     "run_agent",
+    "stream_agent",
+    "aclose_clients",
 ]
@@ -1,13 +1,53 @@
 """Agent nodes for the multi-agent system."""
 
-from langchain_core.messages import AIMessage, HumanMessage
+import asyncio
+import weakref
+from functools import partial
+from typing import Any, Sequence
+
+import orjson
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 
 from src.config import config
-from src.state import AgentState
+from src.llm_cache import llm_cache
+from src.state import AgentState, recent_messages
 from src.tools import AGENT_TOOLS
 
 
+class LLMBatcher:
+    """Overlaps LLM calls from agents running in the same superstep.
+    
+    Agents dispatched together via Send run as concurrent tasks, so their
+    calls are in flight at the same time; the batcher caps how many reach
+    the API at once so large fan-outs stay under provider rate limits.
+    """
+    
+    def __init__(self, max_concurrency: int):
+        self._max_concurrency = max_concurrency
+        # A semaphore binds to the loop it first waits on, so keep one per loop
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    
+    async def ainvoke(self, llm: Any, messages: Sequence[BaseMessage]) -> Any:
+        """Invoke the LLM once a concurrency slot is available."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self._max_concurrency)
+        async with semaphore:
+            return await llm.ainvoke(messages)
+
+
+_LLM_BATCHER = LLMBatcher(config.max_concurrency)
+
+# One client shared by every agent; each binds its own tool set to it
+_SHARED_LLM = ChatOpenAI(
+    model=config.model_name,
+    temperature=config.temperature,
+    api_key=config.openai_api_key
+)
+
+
 def create_agent_node(agent_name: str):
     """Factory function to create an agent node.
     
@@ -18,17 +58,24 @@ def create_agent_node(agent_name: str):
         Agent node function that processes state and returns updated state
     """
     tools = AGENT_TOOLS.get(agent_name, [])
-    
-    llm = ChatOpenAI(
-        model=config.model_name,
-        temperature=config.temperature,
-        api_key=config.openai_api_key
-    )
+    tools_by_name = {tool.name: tool for tool in tools}
     
     if tools:
-        llm_with_tools = llm.bind_tools(tools)
+        llm_with_tools = _SHARED_LLM.bind_tools(tools)
     else:
-        llm_with_tools = llm
+        llm_with_tools = _SHARED_LLM
+    
+    # The role and guidelines are static per agent, so build them once and
+    # send them first; keeping the prefix byte-identical across calls lets
+    # OpenAI prompt caching reuse it
+    prompt_prefix = f"""You are a specialized {agent_name} agent.
+Your role: {_get_agent_role(agent_name)}
+
+Guidelines:
+- Use your tools to complete the assigned task
+- Be concise and focused on the specific task
+- Report results clearly
+- If you cannot complete the task, explain why"""
     
     async def agent_node(state: AgentState) -> AgentState:
         """Process the current state and execute agent logic.
@@ -42,69 +89,61 @@ def create_agent_node(agent_name: str):
         messages = state["messages"]
         task_context = state.get("task_context", {})
         
-        # Create system message for this agent
-        system_prompt = f"""You are a specialized {agent_name} agent.
-Your role: {_get_agent_role(agent_name)}
-
-Guidelines:
-- Use your tools to complete the assigned task
-- Be concise and focused on the specific task
-- Report results clearly
-- If you cannot complete the task, explain why
-
-Current task context: {task_context}"""
-        
-        # Prepare messages with system prompt
-        agent_messages = [HumanMessage(content=system_prompt)] + list(messages)
+        # Prepare messages: static prefix, history, then per-call context
+        agent_messages = [
+            HumanMessage(content=prompt_prefix),
+            *recent_messages(messages),
+            HumanMessage(content=f"Current task context: {task_context}")
+        ]
         
         # Get response from LLM
-        response = await llm_with_tools.ainvoke(agent_messages)
+        response = await llm_cache.ainvoke(
+            partial(_LLM_BATCHER.ainvoke, llm_with_tools),
+            agent_messages,
+            model=config.model_name,
+            temperature=config.temperature,
+            tools=tools
+        )
         
         # If the model wants to use tools, execute them
         if hasattr(response, 'tool_calls') and response.tool_calls:
+            # Execute all known tools concurrently; most are I/O bound
+            tool_calls = [tc for tc in response.tool_calls if tc["name"] in tools_by_name]
+            results = await asyncio.gather(
+                *(tools_by_name[tc["name"]].ainvoke(tc["args"]) for tc in tool_calls),
+                return_exceptions=True
+            )
+            
             tool_results = []
-            for tool_call in response.tool_calls:
-                tool_name = tool_call["name"]
-                tool_args = tool_call["args"]
-                
-                # Find and execute the tool
-                for tool in tools:
-                    if tool.name == tool_name:
-                        try:
-                            result = tool.invoke(tool_args)
-                            tool_results.append({
-                                "tool": tool_name,
-                                "args": tool_args,
-                                "result": result
-                            })
-                        except Exception as e:
-                            tool_results.append({
-                                "tool": tool_name,
-                                "args": tool_args,
-                                "error": str(e)
-                            })
-                        break
+            for tool_call, result in zip(tool_calls, results):
+                if isinstance(result, BaseException):
+                    tool_results.append({
+                        "tool": tool_call["name"],
+                        "args": tool_call["args"],
+                        "error": str(result)
+                    })
+                else:
+                    tool_results.append({
+                        "tool": tool_call["name"],
+                        "args": tool_call["args"],
+                        "result": result
+                    })
             
             # Create summary message with tool results
-            result_summary = f"[{agent_name.upper()} AGENT RESULTS]\n"
-            for tr in tool_results:
-                if "error" in tr:
-                    result_summary += f"Tool {tr['tool']} failed: {tr['error']}\n"
-                else:
-                    result_summary += f"Tool {tr['tool']}: {tr['result']}\n"
+            result_summary = orjson.dumps(
+                {"agent": agent_name, "tool_results": tool_results},
+                default=str
+            ).decode()
             
             final_message = AIMessage(content=result_summary)
             
-            # Update intermediate results
-            new_results = list(state.get("intermediate_results", []))
-            new_results.append({
-                "agent": agent_name,
-                "tool_results": tool_results
-            })
-            
+            # Append to intermediate results (merged by the state reducer)
             return {
                 "messages": [final_message],
-                "intermediate_results": new_results
+                "intermediate_results": [{
+                    "agent": agent_name,
+                    "tool_results": tool_results
+                }]
             }
         else:
             # No tool calls, just return the response
@@ -0,0 +1,214 @@
+"""Long-lived Python worker process for the code agent's execute_python tool.
+
+The worker reads length-prefixed JSON frames ``{"id": ..., "code": ...,
+"timeout": ...}`` on stdin and answers each with ``{"id": ..., "stdout": ...,
+"stderr": ..., "exit_code": ..., "timed_out": ...}`` on stdout.
+
+Each request runs in a child forked from this already-started interpreter,
+which skips interpreter startup but gives the snippet a private copy of the
+process: changes to the cwd, environment, sys.path, imported modules or
+builtins die with the child. Where fork is unavailable the worker runs a
+single snippet in-process and then exits, so the pool starts a fresh worker
+for the next request.
+
+Run with: python src/code_worker.py [memory_limit_mb]
+"""
+
+import builtins
+import contextlib
+import io
+import json
+import os
+import select
+import signal
+import struct
+import sys
+import tempfile
+import traceback
+import types
+
+# Frame header: 4-byte big-endian payload length
+HEADER = struct.Struct(">I")
+
+
+def encode_frame(payload: dict) -> bytes:
+    """Encode a payload as a length-prefixed JSON frame."""
+    data = json.dumps(payload).encode()
+    return HEADER.pack(len(data)) + data
+
+
+def _apply_limits(memory_limit_mb: int) -> None:
+    """Cap address space so a runaway snippet cannot exhaust host memory."""
+    try:
+        import resource
+    except ImportError:
+        return
+    if memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_snippet(code: str) -> int:
+    """Run code as the __main__ module, like ``python script.py``.
+
+    The snippet gets its own module installed as sys.modules["__main__"], so
+    pickle, typing.get_type_hints and multiprocessing can resolve the names
+    it defines. Returns the exit code.
+    """
+    module = types.ModuleType("__main__")
+    module.__builtins__ = builtins
+    previous_main = sys.modules.get("__main__")
+    sys.modules["__main__"] = module
+    try:
+        exec(compile(code, "<agent>", "exec"), module.__dict__)
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Drop this module's frame so the traceback starts at the snippet
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    finally:
+        sys.modules["__main__"] = previous_main
+
+
+def _capture_output(stdout_fd: int, stderr_fd: int) -> None:
+    """Point fds 1/2 and sys.stdout/sys.stderr at the capture files.
+
+    Redirecting the fds, not just the Python streams, also captures output
+    from subprocesses and C extensions.
+    """
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    sys.stdout = open(1, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+
+
+def _flush_output() -> None:
+    for stream in (sys.stdout, sys.stderr):
+        with contextlib.suppress(Exception):
+            stream.flush()
+
+
+def _run_forked(
+    code: str,
+    timeout: float,
+    memory_limit_mb: int,
+    stdout_fd: int,
+    stderr_fd: int,
+    close_fds: tuple[int, ...]
+) -> tuple[int, bool]:
+    """Run code in a forked child. Returns (exit_code, timed_out)."""
+    # The child holds the write end open; EOF on the read end means it exited
+    done_r, done_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(done_r)
+            for fd in close_fds:
+                os.close(fd)
+            # Own process group, so a timeout also kills anything it spawned
+            os.setpgid(0, 0)
+            _capture_output(stdout_fd, stderr_fd)
+            _apply_limits(memory_limit_mb)
+            exit_code = _run_snippet(code)
+            _flush_output()
+        except BaseException:
+            exit_code = 1
+        os._exit(exit_code & 0xFF)
+
+    os.close(done_w)
+    with contextlib.suppress(OSError):
+        os.setpgid(pid, pid)
+    try:
+        ready, _, _ = select.select([done_r], [], [], timeout)
+    finally:
+        os.close(done_r)
+    timed_out = not ready
+
+    # Clean up the child and anything it left running in its group
+    with contextlib.suppress(OSError):
+        os.killpg(pid, signal.SIGKILL)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status), timed_out
+
+
+def _run_in_process(code: str, stdout_fd: int, stderr_fd: int) -> int:
+    """Run code in this process; used only where fork is unavailable."""
+    _capture_output(stdout_fd, stderr_fd)
+    exit_code = _run_snippet(code)
+    _flush_output()
+    return exit_code
+
+
+def main() -> None:
+    # Keep private handles to the protocol pipes, then point fds 0/1 away from
+    # them so snippets (or their subprocesses) cannot corrupt the framing.
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+    sys.stdin = io.StringIO()
+    # Resolve imports like a script run from the working directory
+    sys.path[0] = os.getcwd()
+
+    memory_limit_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    can_fork = hasattr(os, "fork")
+    close_fds = (proto_in.fileno(), proto_out.fileno())
+
+    # Bind everything used to frame replies before any snippet runs, so code
+    # that patches json, builtins or this module cannot forge a reply
+    read, write, flush = proto_in.read, proto_out.write, proto_out.flush
+    loads, dumps = json.loads, json.dumps
+    pack, unpack, header_size = HEADER.pack, HEADER.unpack, HEADER.size
+    _len, _temp_file = len, tempfile.TemporaryFile
+
+    while True:
+        header = read(header_size)
+        if _len(header) < header_size:
+            break
+        (length,) = unpack(header)
+        request = loads(read(length))
+
+        with _temp_file() as stdout_file, _temp_file() as stderr_file:
+            if can_fork:
+                exit_code, timed_out = _run_forked(
+                    request["code"],
+                    request.get("timeout", 30),
+                    memory_limit_mb,
+                    stdout_file.fileno(),
+                    stderr_file.fileno(),
+                    close_fds
+                )
+            else:
+                # No per-request timeout here; the pool kills the worker
+                exit_code = _run_in_process(request["code"], stdout_file.fileno(), stderr_file.fileno())
+                timed_out = False
+
+            stdout_file.seek(0)
+            stderr_file.seek(0)
+            data = dumps({
+                "id": request["id"],
+                "stdout": stdout_file.read().decode("utf-8", "replace"),
+                "stderr": stderr_file.read().decode("utf-8", "replace"),
+                "exit_code": exit_code,
+                "timed_out": timed_out,
+            }).encode()
+
+        write(pack(_len(data)) + data)
+        flush()
+
+        if not can_fork:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ class Config:
     openai_api_key: str = field(default_factory=lambda: os.getenv("OPENAI_API_KEY", ""))
     model_name: str = field(default_factory=lambda: os.getenv("MODEL_NAME", "gpt-4o"))
     temperature: float = field(default_factory=lambda: float(os.getenv("TEMPERATURE", "0")))
+    max_history_messages: int = field(default_factory=lambda: int(os.getenv("MAX_HISTORY_MESSAGES", "20")))
+    max_history_tokens: int = field(default_factory=lambda: int(os.getenv("MAX_HISTORY_TOKENS", "0")))
     
     # Tavily Search
     tavily_api_key: str = field(default_factory=lambda: os.getenv("TAVILY_API_KEY", ""))
@@ -24,9 +26,31 @@ class Config:
     
     # File System
     allowed_file_path: str = field(default_factory=lambda: os.getenv("ALLOWED_FILE_PATH", os.getcwd()))
+    allowed_file_path_abs: str = field(init=False)
+    max_read_bytes: int = field(default_factory=lambda: int(os.getenv("MAX_READ_BYTES", str(1024 * 1024))))
     
     # Code Execution
     code_execution_timeout: int = field(default_factory=lambda: int(os.getenv("CODE_EXECUTION_TIMEOUT", "30")))
+    code_worker_pool_size: int = field(default_factory=lambda: int(os.getenv("CODE_WORKER_POOL_SIZE", "2")))
+    code_worker_memory_limit_mb: int = field(default_factory=lambda: int(os.getenv("CODE_WORKER_MEMORY_LIMIT_MB", "512")))
+    
+    # Route structurally obvious cases without calling the supervisor LLM
+    supervisor_fast_path: bool = field(default_factory=lambda: os.getenv("SUPERVISOR_FAST_PATH", "true").lower() == "true")
+    
+    # Maximum concurrent LLM requests across parallel agents
+    max_concurrency: int = field(default_factory=lambda: int(os.getenv("MAX_CONCURRENCY", "8")))
+    
+    # LLM Response Cache
+    llm_cache_enabled: bool = field(default_factory=lambda: os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true")
+    llm_cache_max_size: int = field(default_factory=lambda: int(os.getenv("LLM_CACHE_MAX_SIZE", "1024")))
+    llm_cache_redis_url: str = field(default_factory=lambda: os.getenv("LLM_CACHE_REDIS_URL", ""))
+    llm_cache_ttl: int = field(default_factory=lambda: int(os.getenv("LLM_CACHE_TTL", "3600")))
+    semantic_cache_enabled: bool = field(default_factory=lambda: os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true")
+    semantic_cache_threshold: float = field(default_factory=lambda: float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")))
+    
+    def __post_init__(self):
+        # Resolved once; the allowed directory is fixed for the process lifetime
+        self.allowed_file_path_abs = os.path.abspath(self.allowed_file_path)
     
     def validate(self) -> list[str]:
         """Validate required configuration. Returns list of missing keys."""
@@ -1,6 +1,7 @@
 """LangGraph workflow definition for the multi-agent system."""
 
 from langgraph.graph import END, StateGraph
+from langgraph.types import Send
 
 from src.agents import AGENT_NODES
 from src.state import AgentState
@@ -12,6 +13,7 @@ def create_graph() -> StateGraph:
     
     The graph follows a hub-and-spoke pattern:
     - Supervisor is the central hub that routes to agents
+    - Independent agents are fanned out in parallel with Send
     - Agents execute their tasks and return to supervisor
     - Supervisor decides next step until task is complete
     
@@ -28,26 +30,27 @@ def create_graph() -> StateGraph:
     for agent_name, agent_func in AGENT_NODES.items():
         graph.add_node(agent_name, agent_func)
     
-    # Define routing function based on supervisor's decision
-    def route_to_agent(state: AgentState) -> str:
-        """Route to the next agent based on supervisor decision."""
-        next_agent = state.get("next_agent", "FINISH")
-        if next_agent == "FINISH":
+    # Define dispatch function based on supervisor's decision
+    def dispatch_to_agents(state: AgentState) -> list[Send] | str:
+        """Fan out to every agent the supervisor selected, or END if none."""
+        next_agents = state.get("next_agents", [])
+        if not next_agents:
             return END
-        return next_agent
+        
+        task_context = state.get("task_context", {})
+        return [
+            Send(
+                assignment["agent"],
+                {**state, "task_context": {**task_context, "subtask": assignment["subtask"]}}
+            )
+            for assignment in next_agents
+        ]
     
     # Add conditional edges from supervisor to agents or END
     graph.add_conditional_edges(
         "supervisor",
-        route_to_agent,
-        {
-            "research": "research",
-            "code": "code",
-            "files": "files",
-            "database": "database",
-            "api": "api",
-            END: END
-        }
+        dispatch_to_agents,
+        [*AGENT_NODES.keys(), END]
     )
     
     # Add edges from all agents back to supervisor
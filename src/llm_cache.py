@@ -0,0 +1,324 @@
+"""Response cache for LLM calls made by the supervisor and agents."""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Sequence
+
+import numpy as np
+import orjson
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from pydantic import BaseModel
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# Storage Backends
+# =============================================================================
+
+class _MemoryBackend:
+    """In-process LRU store of serialized responses."""
+    
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+    
+    async def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: bytes) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+
+class _RedisBackend:
+    """Redis store of serialized responses, shared across processes."""
+    
+    def __init__(self, url: str, ttl: int):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError(
+                "LLM_CACHE_REDIS_URL is set but the 'redis' package is not installed. "
+                "Install it with: pip install 'multi-agent-system[redis]'"
+            ) from e
+        self._redis = redis
+        self._url = url
+        self._ttl = ttl
+        # redis.asyncio connections belong to the loop that opened them
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self._redis.from_url(self._url)
+        return client
+    
+    async def get(self, key: str) -> bytes | None:
+        return await self._client().get(f"llm_cache:{key}")
+    
+    async def set(self, key: str, value: bytes) -> None:
+        await self._client().set(f"llm_cache:{key}", value, ex=self._ttl or None)
+
+
+# =============================================================================
+# Semantic Similarity Tier
+# =============================================================================
+
+class _SemanticIndex:
+    """Maps prompt embeddings to exact cache keys for near-duplicate lookups.
+    
+    The vectors of each namespace are stacked into one matrix on first
+    lookup, so scoring every entry is a single matrix-vector product.
+    """
+    
+    def __init__(self, threshold: float, max_size: int):
+        self._threshold = threshold
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, np.ndarray]] = OrderedDict()
+        self._matrices: dict[str, tuple[list[str], np.ndarray]] = {}
+        self._embeddings = None
+    
+    async def embed(self, text: str) -> np.ndarray:
+        if self._embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+            self._embeddings = OpenAIEmbeddings(api_key=config.openai_api_key)
+        vector = np.asarray(await self._embeddings.aembed_query(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+    
+    def lookup(self, namespace: str, vector: np.ndarray) -> str | None:
+        """Return the cache key of the most similar prompt above the threshold."""
+        matrix = self._matrices.get(namespace)
+        if matrix is None:
+            keys = [key for key, (entry_namespace, _) in self._entries.items() if entry_namespace == namespace]
+            if not keys:
+                return None
+            matrix = self._matrices[namespace] = (keys, np.stack([self._entries[key][1] for key in keys]))
+        keys, vectors = matrix
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self._threshold else None
+    
+    def add(self, key: str, namespace: str, vector: np.ndarray) -> None:
+        self._entries[key] = (namespace, vector)
+        self._matrices.pop(namespace, None)
+        while len(self._entries) > self._max_size:
+            _, (evicted_namespace, _) = self._entries.popitem(last=False)
+            self._matrices.pop(evicted_namespace, None)
+
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+def _serialize_message(message: BaseMessage) -> dict:
+    """Reduce a message to the fields that affect the model's response.
+    
+    Message ids are assigned per run by the graph, so they are left out to
+    keep keys stable across identical conversations.
+    """
+    return {
+        "type": message.type,
+        "content": message.content,
+        "name": message.name,
+        "tool_calls": [
+            {"name": tc["name"], "args": tc["args"]}
+            for tc in getattr(message, "tool_calls", None) or []
+        ],
+    }
+
+
+def _encode(value: Any) -> bytes:
+    """Serialize a response as JSON; messages via message_to_dict."""
+    if isinstance(value, BaseMessage):
+        return orjson.dumps(message_to_dict(value), default=str)
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    raise TypeError(f"Cannot cache response of type {type(value).__name__}")
+
+
+def _decode(data: bytes, schema: type[BaseModel] | None) -> Any:
+    """Rebuild a response stored by _encode. Only data is loaded, never code."""
+    if schema is not None:
+        return schema.model_validate_json(data)
+    message = orjson.loads(data)
+    # Let the graph assign a fresh id; a reused one would replace the earlier
+    # copy of this message in the conversation instead of appending
+    message["data"]["id"] = None
+    return messages_from_dict([message])[0]
+
+
+def _tool_name(tool: Any) -> str:
+    return getattr(tool, "name", None) or getattr(tool, "__name__", None) or str(tool)
+
+
+class LLMCache:
+    """Cache of LLM responses keyed on model, temperature, messages and tools.
+    
+    Calls with temperature=0 are served from exact matches in an in-memory
+    LRU (or Redis when LLM_CACHE_REDIS_URL is set). Sampled calls with
+    temperature > 0 are only cached when SEMANTIC_CACHE_ENABLED is true, and
+    are then served by embedding similarity to previously cached prompts.
+    Identical requests that are already in flight are coalesced onto a
+    single API call.
+    """
+    
+    def __init__(self):
+        self.enabled = config.llm_cache_enabled
+        self._inflight: dict[str, asyncio.Task] = {}
+        if config.llm_cache_redis_url:
+            self._backend = _RedisBackend(config.llm_cache_redis_url, config.llm_cache_ttl)
+        else:
+            self._backend = _MemoryBackend(config.llm_cache_max_size)
+        self._semantic = (
+            _SemanticIndex(config.semantic_cache_threshold, config.llm_cache_max_size)
+            if config.semantic_cache_enabled else None
+        )
+    
+    @staticmethod
+    def cache_key(
+        model: str,
+        messages: Sequence[BaseMessage],
+        temperature: float,
+        tools: Sequence[Any] | None = None
+    ) -> str:
+        """Compute a stable SHA-256 key for an LLM request."""
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "messages": [_serialize_message(m) for m in messages],
+            "tools": sorted(_tool_name(t) for t in tools or []),
+        }
+        return hashlib.sha256(
+            orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+        ).hexdigest()
+    
+    async def get(self, key: str, schema: type[BaseModel] | None = None) -> Any | None:
+        """Return the cached response for key, or None on a miss.
+        
+        Backend and decoding errors are logged and treated as a miss, so a
+        broken cache never stops the LLM from being called.
+        """
+        try:
+            value = await self._backend.get(key)
+            return _decode(value, schema) if value is not None else None
+        except Exception as e:
+            logger.warning("LLM cache read failed, calling the model directly: %s", e)
+            return None
+    
+    async def set(self, key: str, value: Any) -> None:
+        """Store a response. Errors are logged and otherwise ignored."""
+        try:
+            await self._backend.set(key, _encode(value))
+        except Exception as e:
+            logger.warning("LLM cache write failed: %s", e)
+    
+    async def ainvoke(
+        self,
+        call: Callable[[Sequence[BaseMessage]], Awaitable[Any]],
+        messages: Sequence[BaseMessage],
+        *,
+        model: str,
+        temperature: float,
+        tools: Sequence[Any] | None = None,
+        schema: type[BaseModel] | None = None
+    ) -> Any:
+        """Return a cached response for this request, or make the call and cache it.
+        
+        Args:
+            call: Async callable performing the real LLM request (e.g. ``llm.ainvoke``)
+            messages: Messages sent to the model
+            model: Model name, part of the cache key
+            temperature: Sampling temperature, part of the cache key
+            tools: Tools bound to the model, part of the cache key
+            schema: Pydantic model the response is an instance of, for
+                structured output; responses are otherwise messages
+        
+        Returns:
+            The (possibly cached) LLM response
+        """
+        if not self.enabled:
+            return await call(messages)
+        
+        key = self.cache_key(model, messages, temperature, tools)
+        
+        # Singleflight: later identical callers await the first caller's task.
+        # The check and insert happen without an await in between, so no lock
+        # is needed on the single-threaded event loop.
+        task = self._inflight.get(key)
+        if task is not None:
+            # Hand out a copy so callers never share a mutable message object
+            return copy.deepcopy(await asyncio.shield(task))
+        
+        task = asyncio.ensure_future(
+            self._get_or_invoke(key, call, messages, model, temperature, tools, schema)
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so cancelling this caller does not cancel the other waiters
+        return await asyncio.shield(task)
+    
+    async def _get_or_invoke(
+        self,
+        key: str,
+        call: Callable[[Sequence[BaseMessage]], Awaitable[Any]],
+        messages: Sequence[BaseMessage],
+        model: str,
+        temperature: float,
+        tools: Sequence[Any] | None,
+        schema: type[BaseModel] | None
+    ) -> Any:
+        # Exact hits are only served at temperature=0, where the response
+        # is deterministic; sampled calls can only hit the semantic tier
+        if temperature == 0:
+            cached = await self.get(key, schema)
+            if cached is not None:
+                return cached
+            result = await call(messages)
+            if result is not None:
+                await self.set(key, result)
+            return result
+        
+        if self._semantic is None:
+            return await call(messages)
+        
+        # Embed only what varies between calls. The static instructions at
+        # the front are identical for every call from one caller and would
+        # otherwise dominate the similarity of unrelated queries.
+        prefix, dynamic = (messages[:1], messages[1:]) if len(messages) > 1 else ([], messages)
+        namespace = self.cache_key(model, prefix, temperature, tools)
+        text = "\n".join(f"{m.type}: {m.content}" for m in dynamic)
+        vector = None
+        try:
+            vector = await self._semantic.embed(text)
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed, skipping lookup: %s", e)
+        if vector is not None and (similar_key := self._semantic.lookup(namespace, vector)):
+            cached = await self.get(similar_key, schema)
+            if cached is not None:
+                return cached
+        
+        result = await call(messages)
+        # Tool calls carry arguments for the exact prompt they answer, so
+        # they are never replayed for one that is merely similar
+        if vector is not None and result is not None and not getattr(result, "tool_calls", None):
+            await self.set(key, result)
+            self._semantic.add(key, namespace, vector)
+        return result
+
+
+# Global cache instance
+llm_cache = LLMCache()
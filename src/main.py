@@ -2,33 +2,51 @@
 
 import asyncio
 import sys
+from contextlib import aclosing
+from typing import AsyncIterator
 
 from langchain_core.messages import HumanMessage
 
+from src.agents import AGENT_NODES
 from src.config import config
 from src.graph import workflow
 from src.state import AgentState
+from src.tools import aclose_clients
 
 
-async def run_agent(query: str, verbose: bool = True) -> str:
-    """Run the multi-agent system with a user query.
+def _print_node_output(node_name: str, node_output: dict) -> None:
+    """Print which node just executed and what it produced."""
+    if node_name == "supervisor":
+        next_agents = [a["agent"] for a in node_output.get("next_agents", [])]
+        reason = node_output.get("task_context", {}).get("last_routing_reason", "")
+        print(f"[SUPERVISOR] Routing to: {', '.join(next_agents) or 'FINISH'}")
+        if reason:
+            print(f"  Reason: {reason}")
+    else:
+        messages = node_output.get("messages", [])
+        if messages:
+            print(f"[{node_name.upper()}] {messages[-1].content[:200]}...")
+    print()
+
+
+async def _agent_events(query: str, verbose: bool) -> AsyncIterator[tuple[str, str | None, int, str]]:
+    """Yield (kind, run, step, text) events for the agent runs in the workflow.
     
-    Args:
-        query: The user's question or task
-        verbose: Whether to print intermediate steps
-        
-    Returns:
-        Final response from the agent system
+    run is the checkpoint namespace of the agent run (parallel agents each
+    have their own) and step the superstep it ran in. kind is "token" for a
+    streamed chunk, "answer" for the full text of a direct response, or
+    "summary" for the tool results of a run that called tools.
     """
     # Validate configuration
     missing = config.validate()
     if missing:
-        return f"Error: Missing required configuration: {', '.join(missing)}"
+        yield "answer", None, 0, f"Error: Missing required configuration: {', '.join(missing)}"
+        return
     
     # Create initial state
     initial_state: AgentState = {
         "messages": [HumanMessage(content=query)],
-        "next_agent": "",
+        "next_agents": [],
         "task_context": {"original_query": query},
         "intermediate_results": []
     }
@@ -38,35 +56,132 @@ async def run_agent(query: str, verbose: bool = True) -> str:
         print(f"Query: {query}")
         print(f"{'='*60}\n")
     
-    # Run the workflow
-    final_state = None
-    async for state in workflow.astream(initial_state):
-        if verbose:
-            # Print which node just executed
-            for node_name, node_output in state.items():
-                if node_name == "supervisor":
-                    next_agent = node_output.get("next_agent", "?")
-                    reason = node_output.get("task_context", {}).get("last_routing_reason", "")
-                    print(f"[SUPERVISOR] Routing to: {next_agent}")
-                    if reason:
-                        print(f"  Reason: {reason}")
-                else:
-                    messages = node_output.get("messages", [])
-                    if messages:
-                        print(f"[{node_name.upper()}] {messages[-1].content[:200]}...")
-                print()
+    async for event in workflow.astream_events(initial_state, version="v2"):
+        kind = event["event"]
+        metadata = event.get("metadata", {})
+        node_name = metadata.get("langgraph_node")
+        run = metadata.get("langgraph_checkpoint_ns")
+        step = metadata.get("langgraph_step", 0)
         
-        final_state = state
-    
-    # Extract final response
-    if final_state:
-        # Get the last set of messages from any node
-        for node_output in final_state.values():
-            messages = node_output.get("messages", [])
+        if kind == "on_chat_model_stream" and node_name in AGENT_NODES:
+            content = event["data"]["chunk"].content
+            if content and isinstance(content, str):
+                yield "token", run, step, content
+        
+        elif kind == "on_chain_end" and event["name"] == node_name:
+            node_output = event["data"].get("output") or {}
+            if verbose:
+                _print_node_output(node_name, node_output)
+            
+            messages = node_output.get("messages", []) if node_name in AGENT_NODES else []
             if messages:
-                return messages[-1].content
+                event_kind = "summary" if "intermediate_results" in node_output else "answer"
+                yield event_kind, run, step, messages[-1].content
+
+
+async def stream_agent(query: str, verbose: bool = False) -> AsyncIterator[str]:
+    """Run the multi-agent system and yield response tokens as they are generated.
+    
+    Agents dispatched in parallel stream at the same time, so tokens are
+    passed through for one agent run at a time while the others are
+    buffered, and each run's text is separated from the next by a blank line.
+    
+    Args:
+        query: The user's question or task
+        verbose: Whether to print intermediate steps
+        
+    Yields:
+        Response text chunks from every agent that answered
+    """
+    active = None
+    # Runs still generating while another is active, and the complete text
+    # of runs that finished while waiting
+    waiting: dict[str | None, list[str]] = {}
+    finished: list[str] = []
+    started = False
+    fallback = None
+    
+    def segment(text: str) -> str:
+        nonlocal started
+        separator = "\n\n" if started else ""
+        started = True
+        return separator + text
+    
+    async with aclosing(_agent_events(query, verbose)) as events:
+        async for kind, run, _, text in events:
+            if kind == "token":
+                if active is None and run not in waiting:
+                    active = run
+                    yield segment(text)
+                elif run == active:
+                    yield text
+                else:
+                    waiting.setdefault(run, []).append(text)
+                continue
+            
+            if kind == "summary":
+                # Tool-result summary; only returned if nothing else was
+                fallback = text
+            
+            if run == active:
+                active = None
+            elif run in waiting:
+                buffered = "".join(waiting.pop(run))
+                full_text = text if kind == "answer" else buffered
+                if full_text:
+                    finished.append(full_text)
+            elif kind == "answer" and text:
+                # Cached responses produce no token events, so emit them whole
+                finished.append(text)
+            
+            if active is None:
+                for full_text in finished:
+                    yield segment(full_text)
+                finished.clear()
+                if waiting:
+                    # Promote the longest-waiting run and catch up on its tokens
+                    active = next(iter(waiting))
+                    yield segment("".join(waiting.pop(active)))
+    
+    for full_text in [*finished, *("".join(tokens) for tokens in waiting.values())]:
+        if full_text:
+            yield segment(full_text)
+    
+    if not started and fallback is not None:
+        yield fallback
+
+
+async def run_agent(query: str, verbose: bool = True) -> str:
+    """Run the multi-agent system with a user query.
+    
+    Use stream_agent() instead to receive tokens as they are generated.
+    Tool clients stay open between runs on the same event loop; await
+    aclose_clients() once before the loop shuts down.
+    
+    Args:
+        query: The user's question or task
+        verbose: Whether to print intermediate steps
+        
+    Returns:
+        Final response from the agent system
+    """
+    # The final response is the answer (or answers, after a parallel
+    # fan-out) from the last superstep that produced one, not every hop
+    answers: list[str] = []
+    answer_step = None
+    summary = None
+    async with aclosing(_agent_events(query, verbose)) as events:
+        async for kind, _, step, text in events:
+            if kind == "answer" and text:
+                if step != answer_step:
+                    answers, answer_step = [], step
+                answers.append(text)
+            elif kind == "summary":
+                summary = text
     
-    return "No response generated"
+    if answers:
+        return "\n\n".join(answers)
+    return summary or "No response generated"
 
 
 async def main():
@@ -79,7 +194,10 @@ async def main():
         sys.exit(1)
     
     query = " ".join(sys.argv[1:])
-    result = await run_agent(query)
+    try:
+        result = await run_agent(query)
+    finally:
+        await aclose_clients()
     
     print(f"\n{'='*60}")
     print("FINAL RESULT:")
@@ -88,4 +206,10 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is faster for the I/O-bound fan-outs here; not available on Windows
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
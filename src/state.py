@@ -1,23 +1,28 @@
 """Shared state definitions for the multi-agent system."""
 
-from typing import Annotated, Literal, TypedDict
+import operator
+from functools import lru_cache
+from typing import Annotated, Literal, Sequence, TypedDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
+from src.config import config
+
 
 class AgentState(TypedDict):
     """Shared state passed between all agents in the graph.
     
     Attributes:
         messages: Conversation history with message accumulation
-        next_agent: The next agent to route to (set by supervisor)
+        next_agents: Agents and their subtasks to run next (set by supervisor)
         task_context: Additional context about the current task
-        intermediate_results: Results from agent executions
+        intermediate_results: Results from agent executions, merged across
+            agents that run in parallel
     """
     messages: Annotated[list[BaseMessage], add_messages]
-    next_agent: str
+    next_agents: list[dict]
     task_context: dict
-    intermediate_results: list[dict]
+    intermediate_results: Annotated[list[dict], operator.add]
 
 
 # Agent identifiers
@@ -32,3 +37,38 @@ AGENT_DESCRIPTIONS = {
     "api": "External API requests and integrations",
     "FINISH": "Task is complete, return final response to user",
 }
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str):
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def recent_messages(messages: Sequence[BaseMessage]) -> Sequence[BaseMessage]:
+    """Return the tail of the conversation that fits the history budget.
+    
+    Keeps at most config.max_history_messages messages and, when
+    config.max_history_tokens is set, drops the oldest of those until the
+    rest fit the token budget. The latest message is always kept.
+    """
+    if config.max_history_messages > 0:
+        messages = messages[-config.max_history_messages:]
+    
+    if config.max_history_tokens > 0 and messages:
+        encoding = _get_encoding(config.model_name)
+        budget = config.max_history_tokens
+        start = len(messages) - 1
+        budget -= len(encoding.encode(str(messages[start].content)))
+        while start > 0:
+            cost = len(encoding.encode(str(messages[start - 1].content)))
+            if cost > budget:
+                break
+            budget -= cost
+            start -= 1
+        messages = messages[start:]
+    
+    return messages
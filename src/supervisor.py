@@ -1,56 +1,50 @@
 """Supervisor agent for routing between specialized agents."""
 
+import re
+from functools import lru_cache
 from typing import Literal
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
 from src.config import config
-from src.state import AGENT_DESCRIPTIONS, AgentState
+from src.llm_cache import llm_cache
+from src.state import AGENT_DESCRIPTIONS, AgentState, recent_messages
+
+
+class AgentAssignment(BaseModel):
+    """A single agent dispatch and the subtask it should work on."""
+    
+    agent: Literal["research", "code", "files", "database", "api", "FINISH"] = Field(
+        description="The agent to route to, or FINISH if task is complete"
+    )
+    subtask: str = Field(
+        description="The specific part of the task this agent should handle"
+    )
 
 
 class RouterDecision(BaseModel):
     """Structured output for supervisor routing decisions."""
     
-    next_agent: Literal["research", "code", "files", "database", "api", "FINISH"] = Field(
-        description="The next agent to route to, or FINISH if task is complete"
+    next_agents: list[AgentAssignment] = Field(
+        description="Agents to run next. Multiple agents run in parallel, so only "
+        "list several when their subtasks are independent of each other"
     )
     reasoning: str = Field(
         description="Brief explanation of why this agent was chosen"
     )
 
 
-async def supervisor_node(state: AgentState) -> AgentState:
-    """Supervisor agent that decides which agent to route to next.
-    
-    The supervisor analyzes:
-    1. The original user request
-    2. Conversation history and intermediate results
-    3. What work remains to be done
-    
-    Then routes to the most appropriate agent or FINISH.
-    """
-    messages = state["messages"]
-    intermediate_results = state.get("intermediate_results", [])
-    task_context = state.get("task_context", {})
-    
-    # Build agent descriptions for the prompt
-    agent_desc = "\n".join([
-        f"- {name}: {desc}" 
-        for name, desc in AGENT_DESCRIPTIONS.items()
-    ])
-    
-    # Build summary of work done so far
-    work_done = ""
-    if intermediate_results:
-        work_done = "\n\nWork completed so far:\n"
-        for result in intermediate_results:
-            agent = result.get("agent", "unknown")
-            tools_used = [tr.get("tool", "?") for tr in result.get("tool_results", [])]
-            work_done += f"- {agent} agent used: {', '.join(tools_used)}\n"
-    
-    system_prompt = f"""You are a supervisor agent that routes tasks to specialized agents.
+# The static instructions are built once and sent as the first message so
+# every routing request shares a byte-identical prefix for OpenAI prompt
+# caching. Per-call context goes in a separate message after the history.
+_AGENT_DESC_BLOCK = "\n".join(
+    f"- {name}: {desc}"
+    for name, desc in AGENT_DESCRIPTIONS.items()
+)
+
+_STATIC_PREFIX = """You are a supervisor agent that routes tasks to specialized agents.
 
 Available agents:
 {agent_desc}
@@ -58,8 +52,9 @@ Available agents:
 Your job is to:
 1. Analyze the user's request and conversation history
 2. Determine which agent should handle the next step
-3. Route to FINISH when the task is fully complete
-{work_done}
+3. Dispatch several agents at once when their subtasks are independent
+4. Route to FINISH when the task is fully complete
+
 Guidelines:
 - Only route to agents that can make progress on the task
 - Use research agent for web searches and information lookup
@@ -67,30 +62,187 @@ Guidelines:
 - Use files agent for reading/writing files
 - Use database agent for SQL queries
 - Use api agent for HTTP requests to external services
-- Route to FINISH only when the user's request is fully addressed
+- Route to FINISH only when the user's request is fully addressed""".format(agent_desc=_AGENT_DESC_BLOCK)
+
+_CONTEXT_TMPL = """{work_done}Current task context: {task_context}"""
+
+
+# Patterns that identify the one agent a fresh query needs. SQL must open
+# the query, so prose such as "select one of these" does not match.
+_DIRECT_ROUTES = {
+    "api": re.compile(r"https?://\S+", re.IGNORECASE),
+    "database": re.compile(
+        r"^\s*(select\s+(\*|[\w.]+(\s*,\s*[\w.]+)*)\s+from\s+\w+|insert\s+into\s+\w+|update\s+\w+\s+set\b"
+        r"|delete\s+from\s+\w+|create\s+table\s+\w+|drop\s+table\s+\w+)",
+        re.IGNORECASE
+    ),
+    "code": re.compile(r"\bcalculate\b", re.IGNORECASE),
+}
+
+# Words suggesting an agent's involvement; a direct route is only taken when
+# no other agent's cues appear, since the query then likely needs several
+_AGENT_CUES = {
+    "research": re.compile(r"\b(search|research|web|look\s+up|latest|news)\b", re.IGNORECASE),
+    "files": re.compile(r"\b(files?|read|write|list|director(y|ies)|folders?|save)\b", re.IGNORECASE),
+    "database": re.compile(r"\b(sql|database|tables?|query|select|insert|update|delete)\b", re.IGNORECASE),
+    "api": re.compile(r"https?://|\b(url|api|endpoint|http)\b", re.IGNORECASE),
+    "code": re.compile(r"\b(calculate|compute|python|code|script)\b", re.IGNORECASE),
+}
+
+
+# Tools catch their own exceptions and report failures as strings like
+# "SQL error: ..." or a trailing "Exit code: 1" from execute_python
+_TOOL_ERROR = re.compile(r"^(?:\w+ ){0,2}error\b", re.IGNORECASE)
+_EXIT_CODE = re.compile(r"^Exit code: -?\d+\Z", re.MULTILINE)
+
+
+def _tool_failed(tool_result: dict) -> bool:
+    """Whether a recorded tool call raised or returned an error message."""
+    if "error" in tool_result:
+        return True
+    result = tool_result.get("result")
+    return isinstance(result, str) and bool(_TOOL_ERROR.match(result) or _EXIT_CODE.search(result))
+
+
+def _looks_final(content) -> bool:
+    """Heuristic for a complete answer rather than a partial or tool result."""
+    if not isinstance(content, str):
+        return False
+    content = content.strip()
+    return len(content) > 20 and content.endswith((".", "!", "?"))
 
-Current task context: {task_context}"""
 
-    # Create LLM with structured output
+def _fast_route(state: AgentState) -> tuple[list[dict], str] | None:
+    """Resolve routing decisions that need no LLM call.
+    
+    Returns (next_agents, reason), or None to fall back to the router LLM.
+    """
+    messages = state["messages"]
+    intermediate_results = state.get("intermediate_results", [])
+    previous_agents = state.get("next_agents", [])
+    last_message = messages[-1] if messages else None
+    
+    # The single agent dispatched last step replied with what looks like the
+    # final answer, based on tool work of its own that succeeded. After a
+    # fan-out the last message is only one agent's, and a reply with no
+    # tool work behind it may be a refusal, so the router judges those.
+    if len(previous_agents) == 1:
+        agent = previous_agents[0]["agent"]
+        own_results = [r for r in intermediate_results if r.get("agent") == agent]
+        if (
+            own_results
+            and not any(_tool_failed(tr) for tr in own_results[-1].get("tool_results", []))
+            and isinstance(last_message, AIMessage)
+            and not last_message.tool_calls
+            and _looks_final(last_message.content)
+        ):
+            return [], f"{agent} agent response answers the request"
+        return None
+    
+    # A fresh query that clearly belongs to exactly one agent
+    if isinstance(last_message, HumanMessage) and not intermediate_results:
+        query = state.get("task_context", {}).get("original_query") or str(last_message.content)
+        matches = [agent for agent, pattern in _DIRECT_ROUTES.items() if pattern.search(query)]
+        if len(matches) == 1:
+            agent = matches[0]
+            # Words inside a URL say nothing about which agents are needed
+            prose = _DIRECT_ROUTES["api"].sub(" ", query)
+            if not any(
+                cues.search(prose) for other, cues in _AGENT_CUES.items() if other != agent
+            ):
+                return (
+                    [{"agent": agent, "subtask": query}],
+                    f"Query directly matches the {agent} agent"
+                )
+    
+    return None
+
+
+@lru_cache(maxsize=1)
+def _get_router():
+    """Build the structured-output routing LLM once and reuse it across hops.
+    
+    Constructed lazily so the client picks up config after it has been
+    validated, rather than at import time.
+    """
     llm = ChatOpenAI(
         model=config.model_name,
         temperature=0,  # Deterministic routing
         api_key=config.openai_api_key
     )
+    return llm.with_structured_output(RouterDecision)
+
+
+async def supervisor_node(state: AgentState) -> AgentState:
+    """Supervisor agent that decides which agent(s) to route to next.
     
-    structured_llm = llm.with_structured_output(RouterDecision)
+    The supervisor analyzes:
+    1. The original user request
+    2. Conversation history and intermediate results
+    3. What work remains to be done
+    
+    Then routes to the most appropriate agent(s) or FINISH.
+    """
+    messages = state["messages"]
+    intermediate_results = state.get("intermediate_results", [])
+    task_context = state.get("task_context", {})
+    
+    # Skip the LLM call for structurally obvious decisions
+    if config.supervisor_fast_path:
+        fast_decision = _fast_route(state)
+        if fast_decision is not None:
+            next_agents, reason = fast_decision
+            return {
+                "next_agents": next_agents,
+                "task_context": {**task_context, "last_routing_reason": reason}
+            }
+    
+    # Build summary of work done so far
+    work_done = ""
+    if intermediate_results:
+        work_done = "Work completed so far:\n"
+        for result in intermediate_results:
+            agent = result.get("agent", "unknown")
+            tools_used = [tr.get("tool", "?") for tr in result.get("tool_results", [])]
+            work_done += f"- {agent} agent used: {', '.join(tools_used)}\n"
+        work_done += "\n"
+    
+    context_prompt = _CONTEXT_TMPL.format_map({
+        "work_done": work_done,
+        "task_context": task_context
+    })
+
+    structured_llm = _get_router()
     
     # Prepare messages
-    supervisor_messages = [HumanMessage(content=system_prompt)] + list(messages)
+    supervisor_messages = [
+        HumanMessage(content=_STATIC_PREFIX),
+        *recent_messages(messages),
+        HumanMessage(content=context_prompt)
+    ]
     
     # Get routing decision
-    decision: RouterDecision = await structured_llm.ainvoke(supervisor_messages)
+    decision: RouterDecision = await llm_cache.ainvoke(
+        structured_llm.ainvoke,
+        supervisor_messages,
+        model=config.model_name,
+        temperature=0,
+        tools=[RouterDecision],
+        schema=RouterDecision
+    )
     
     # Update task context with routing info
     new_context = dict(task_context)
     new_context["last_routing_reason"] = decision.reasoning
     
+    # FINISH is represented downstream by an empty dispatch list
+    next_agents = [
+        assignment.model_dump()
+        for assignment in decision.next_agents
+        if assignment.agent != "FINISH"
+    ]
+    
     return {
-        "next_agent": decision.next_agent,
+        "next_agents": next_agents,
         "task_context": new_context
     }
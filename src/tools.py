@@ -1,16 +1,22 @@
 """Tools for each specialized agent in the multi-agent system."""
 
 import asyncio
+import contextlib
+import itertools
+import json
 import os
-import subprocess
+import sqlite3
 import sys
 import tempfile
+import weakref
 from typing import Any
 
+import aiosqlite
 import httpx
 from langchain_core.tools import tool
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 
+from src.code_worker import HEADER, encode_frame
 from src.config import config
 
 
@@ -18,8 +24,22 @@ from src.config import config
 # Research Agent Tools
 # =============================================================================
 
+# The long-lived clients in this module are bound to the event loop that
+# created them, so each is kept per loop and released by aclose_clients()
+_TAVILY_CLIENTS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_tavily_client() -> AsyncTavilyClient:
+    """Return this loop's Tavily client, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _TAVILY_CLIENTS.get(loop)
+    if client is None:
+        client = _TAVILY_CLIENTS[loop] = AsyncTavilyClient(api_key=config.tavily_api_key)
+    return client
+
+
 @tool
-def tavily_search(query: str, max_results: int = 5) -> str:
+async def tavily_search(query: str, max_results: int = 5) -> str:
     """Search the web using Tavily API.
     
     Args:
@@ -33,8 +53,7 @@ def tavily_search(query: str, max_results: int = 5) -> str:
         return "Error: TAVILY_API_KEY not configured"
     
     try:
-        client = TavilyClient(api_key=config.tavily_api_key)
-        response = client.search(query=query, max_results=max_results)
+        response = await _get_tavily_client().search(query=query, max_results=max_results)
         
         results = []
         for item in response.get("results", []):
@@ -49,8 +68,86 @@ def tavily_search(query: str, max_results: int = 5) -> str:
 # Code Agent Tools
 # =============================================================================
 
+_CODE_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "code_worker.py")
+_CODE_WORKERS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_CODE_REQUEST_IDS = itertools.count()
+
+
+def _get_code_workers() -> asyncio.Queue:
+    """Return this loop's worker pool, creating it on first use.
+    
+    The pool holds config.code_worker_pool_size slots, which also bounds how
+    many snippets run at once. Empty slots hold None.
+    """
+    loop = asyncio.get_running_loop()
+    workers = _CODE_WORKERS.get(loop)
+    if workers is None:
+        workers = _CODE_WORKERS[loop] = asyncio.Queue()
+        for _ in range(config.code_worker_pool_size):
+            workers.put_nowait(None)
+    return workers
+
+
+async def _acquire_code_worker(workers: asyncio.Queue) -> asyncio.subprocess.Process:
+    """Take a worker from the pool, spawning one if the slot is empty or dead."""
+    worker = await workers.get()
+    if worker is None or worker.returncode is not None:
+        try:
+            worker = await asyncio.create_subprocess_exec(
+                sys.executable, _CODE_WORKER_SCRIPT, str(config.code_worker_memory_limit_mb),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=tempfile.gettempdir()
+            )
+        except BaseException:
+            workers.put_nowait(None)
+            raise
+    return worker
+
+
+# Workers fork a clean child per snippet and enforce the timeout themselves,
+# so the parent only allows a little extra time for the reply. Without fork a
+# worker runs one snippet in-process and exits, and the parent times it out.
+_CODE_WORKERS_FORK = hasattr(os, "fork")
+_CODE_TIMEOUT_GRACE = 5.0 if _CODE_WORKERS_FORK else 0.0
+
+
+def _valid_reply(reply: Any, request_id: int) -> bool:
+    """Check that a worker reply answers request_id and has the expected shape."""
+    return (
+        isinstance(reply, dict)
+        and reply.get("id") == request_id
+        and isinstance(reply.get("stdout"), str)
+        and isinstance(reply.get("stderr"), str)
+        and type(reply.get("exit_code")) is int
+        and type(reply.get("timed_out")) is bool
+    )
+
+
+async def _run_in_worker(worker: asyncio.subprocess.Process, code: str) -> dict | None:
+    """Send code to a worker and wait for its reply.
+    
+    Returns None if the worker died or sent anything other than a well-formed
+    reply to this request; either way it can no longer be trusted.
+    """
+    request_id = next(_CODE_REQUEST_IDS)
+    worker.stdin.write(encode_frame({
+        "id": request_id,
+        "code": code,
+        "timeout": config.code_execution_timeout,
+    }))
+    await worker.stdin.drain()
+    try:
+        (length,) = HEADER.unpack(await worker.stdout.readexactly(HEADER.size))
+        reply = json.loads(await worker.stdout.readexactly(length))
+    except (asyncio.IncompleteReadError, ValueError):
+        return None
+    return reply if _valid_reply(reply, request_id) else None
+
+
 @tool
-def execute_python(code: str) -> str:
+async def execute_python(code: str) -> str:
     """Execute Python code in a sandboxed subprocess.
     
     Args:
@@ -59,36 +156,55 @@ def execute_python(code: str) -> str:
     Returns:
         Output from code execution (stdout + stderr)
     """
+    workers = _get_code_workers()
+    try:
+        worker = await _acquire_code_worker(workers)
+    except Exception as e:
+        return f"Execution error: {str(e)}"
+    
+    # The worker kills a snippet that overruns the timeout itself. A worker
+    # that misses the backstop below, fails mid-request or sends a bad reply
+    # may be wedged or out of sync with the framing, so it is killed and its
+    # slot respawned on demand.
+    healthy = False
+    timeout_message = f"Error: Code execution timed out after {config.code_execution_timeout} seconds"
     try:
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(code)
-            temp_path = f.name
+        result = await asyncio.wait_for(
+            _run_in_worker(worker, code),
+            timeout=config.code_execution_timeout + _CODE_TIMEOUT_GRACE
+        )
+        if result is None:
+            return "Execution error: Python worker exited unexpectedly"
+        healthy = True
         
-        try:
-            result = subprocess.run(
-                [sys.executable, temp_path],
-                capture_output=True,
-                text=True,
-                timeout=config.code_execution_timeout,
-                cwd=tempfile.gettempdir()
-            )
-            
-            output = ""
-            if result.stdout:
-                output += f"STDOUT:\n{result.stdout}\n"
-            if result.stderr:
-                output += f"STDERR:\n{result.stderr}\n"
-            if result.returncode != 0:
-                output += f"Exit code: {result.returncode}"
-            
-            return output.strip() or "Code executed successfully (no output)"
-        finally:
-            os.unlink(temp_path)
-            
-    except subprocess.TimeoutExpired:
-        return f"Error: Code execution timed out after {config.code_execution_timeout} seconds"
+        if result["timed_out"]:
+            return timeout_message
+        
+        output = ""
+        if result["stdout"]:
+            output += f"STDOUT:\n{result['stdout']}\n"
+        if result["stderr"]:
+            output += f"STDERR:\n{result['stderr']}\n"
+        if result["exit_code"] != 0:
+            output += f"Exit code: {result['exit_code']}"
+        
+        return output.strip() or "Code executed successfully (no output)"
+    except asyncio.TimeoutError:
+        return timeout_message
     except Exception as e:
         return f"Execution error: {str(e)}"
+    finally:
+        if not healthy and worker.returncode is None:
+            worker.kill()
+        if healthy and _CODE_WORKERS.get(asyncio.get_running_loop()) is not workers:
+            # The pool was closed while this snippet ran
+            worker.stdin.close()
+            healthy = False
+        if not (healthy and _CODE_WORKERS_FORK):
+            await worker.wait()
+            worker = None
+        # Always refill the slot so no caller waiting on this pool hangs
+        workers.put_nowait(worker)
 
 
 # =============================================================================
@@ -99,8 +215,9 @@ def _validate_path(path: str) -> str | None:
     """Validate that path is within allowed directory. Returns error message if invalid."""
     try:
         abs_path = os.path.abspath(path)
-        allowed = os.path.abspath(config.allowed_file_path)
-        if not abs_path.startswith(allowed):
+        allowed = config.allowed_file_path_abs
+        # commonpath compares whole components, so /allowed_evil is rejected
+        if os.path.commonpath([abs_path, allowed]) != allowed:
             return f"Error: Path '{path}' is outside allowed directory '{config.allowed_file_path}'"
         return None
     except Exception as e:
@@ -115,14 +232,34 @@ def read_file(file_path: str) -> str:
         file_path: Path to the file to read
         
     Returns:
-        File contents or error message
+        File contents (truncated to config.max_read_bytes) or error message
     """
     if error := _validate_path(file_path):
         return error
     
     try:
         with open(file_path, 'r') as f:
-            return f.read()
+            # Read in chunks and stop at the cap so huge files are never fully
+            # loaded into memory. The cap is in bytes of the file's encoding,
+            # so multi-byte text is not allowed past it.
+            chunks = []
+            remaining = config.max_read_bytes
+            truncated = False
+            for chunk in iter(lambda: f.read(65536), ''):
+                data = chunk.encode(f.encoding)
+                if len(data) > remaining:
+                    # Cut at the byte budget, dropping a split trailing character
+                    chunks.append(data[:remaining].decode(f.encoding, errors="ignore"))
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                remaining -= len(data)
+            
+            content = "".join(chunks)
+            if truncated:
+                size = os.fstat(f.fileno()).st_size
+                return content + f"\n... (truncated, {size} bytes total)"
+            return content
     except FileNotFoundError:
         return f"Error: File not found: {file_path}"
     except Exception as e:
@@ -167,12 +304,17 @@ def list_directory(directory_path: str) -> str:
     
     try:
         entries = []
-        for entry in os.scandir(directory_path):
-            entry_type = "DIR " if entry.is_dir() else "FILE"
-            size = "" if entry.is_dir() else f" ({entry.stat().st_size} bytes)"
-            entries.append(f"{entry_type} {entry.name}{size}")
+        with os.scandir(directory_path) as it:
+            for entry in it:
+                # is_dir() is answered from the directory read itself on most
+                # platforms, so only files cost a stat call (for their size)
+                if entry.is_dir():
+                    entries.append(f"DIR  {entry.name}")
+                else:
+                    entries.append(f"FILE {entry.name} ({entry.stat().st_size} bytes)")
         
-        return "\n".join(sorted(entries)) if entries else "Directory is empty"
+        entries.sort()
+        return "\n".join(entries) if entries else "Directory is empty"
     except FileNotFoundError:
         return f"Error: Directory not found: {directory_path}"
     except Exception as e:
@@ -183,8 +325,40 @@ def list_directory(directory_path: str) -> str:
 # Database Agent Tools
 # =============================================================================
 
+_SQLITE_CONNS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_SQLITE_CONNS_LOCKS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def _get_sqlite_conn(db_path: str) -> tuple[aiosqlite.Connection, asyncio.Lock]:
+    """Return a cached connection for db_path and the lock serializing its use.
+    
+    Connections stay open until aclose_clients() so SQLite's page cache
+    persists across queries. Queries run on aiosqlite's worker thread, so
+    they do not block other agents on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    conns = _SQLITE_CONNS.setdefault(loop, {})
+    conns_lock = _SQLITE_CONNS_LOCKS.setdefault(loop, asyncio.Lock())
+    async with conns_lock:
+        if db_path not in conns:
+            conn = await aiosqlite.connect(db_path, isolation_level=None)
+            try:
+                # WAL and relaxed syncing need write access; read-only
+                # databases are still queryable without them
+                for pragma in ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL"):
+                    with contextlib.suppress(sqlite3.Error):
+                        await conn.execute(pragma)
+                await conn.execute("PRAGMA cache_size=-65536")
+            except BaseException:
+                # Stop the connection's thread rather than leak one per retry
+                await conn.close()
+                raise
+            conns[db_path] = (conn, asyncio.Lock())
+        return conns[db_path]
+
+
 @tool
-def execute_sql(query: str, database_path: str = "") -> str:
+async def execute_sql(query: str, database_path: str = "") -> str:
     """Execute SQL query against SQLite database.
     
     Args:
@@ -194,44 +368,56 @@ def execute_sql(query: str, database_path: str = "") -> str:
     Returns:
         Query results or error message
     """
-    import sqlite3
-    
     db_path = database_path or config.database_url.replace("sqlite:///", "")
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute(query)
-        
-        if query.strip().upper().startswith("SELECT"):
-            rows = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            
-            if not rows:
-                return "Query returned no results"
-            
-            result = " | ".join(columns) + "\n" + "-" * 40 + "\n"
-            for row in rows:
-                result += " | ".join(str(val) for val in row) + "\n"
-            return result
-        else:
-            conn.commit()
-            return f"Query executed successfully. Rows affected: {cursor.rowcount}"
+        conn, lock = await _get_sqlite_conn(db_path)
+        async with lock:
+            async with conn.execute(query) as cursor:
+                if query.strip().upper().startswith("SELECT"):
+                    rows = await cursor.fetchall()
+                    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                    
+                    if not rows:
+                        return "Query returned no results"
+                    
+                    result = " | ".join(columns) + "\n" + "-" * 40 + "\n"
+                    for row in rows:
+                        result += " | ".join(str(val) for val in row) + "\n"
+                    return result
+                else:
+                    return f"Query executed successfully. Rows affected: {cursor.rowcount}"
             
     except Exception as e:
         return f"SQL error: {str(e)}"
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 
 # =============================================================================
 # API Agent Tools
 # =============================================================================
 
+_HTTP_CLIENTS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return this loop's HTTP client, creating it on first use.
+    
+    A single long-lived client keeps connections alive between requests
+    instead of paying a TCP+TLS handshake on every call.
+    """
+    loop = asyncio.get_running_loop()
+    client = _HTTP_CLIENTS.get(loop)
+    if client is None:
+        client = _HTTP_CLIENTS[loop] = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            http2=True
+        )
+    return client
+
+
 @tool
-def http_request(
+async def http_request(
     url: str,
     method: str = "GET",
     headers: dict[str, str] | None = None,
@@ -249,28 +435,65 @@ def http_request(
         Response body or error message
     """
     try:
-        with httpx.Client(timeout=30.0) as client:
-            response = client.request(
-                method=method.upper(),
-                url=url,
-                headers=headers or {},
-                content=body
-            )
-            
-            result = f"Status: {response.status_code}\n"
-            result += f"Headers: {dict(response.headers)}\n"
-            result += f"Body:\n{response.text[:2000]}"
-            
-            if len(response.text) > 2000:
-                result += f"\n... (truncated, {len(response.text)} total chars)"
-            
-            return result
+        response = await _get_http_client().request(
+            method=method.upper(),
+            url=url,
+            headers=headers or {},
+            content=body
+        )
+        
+        result = f"Status: {response.status_code}\n"
+        result += f"Headers: {dict(response.headers)}\n"
+        result += f"Body:\n{response.text[:2000]}"
+        
+        if len(response.text) > 2000:
+            result += f"\n... (truncated, {len(response.text)} total chars)"
+        
+        return result
     except httpx.TimeoutException:
         return f"Error: Request to {url} timed out"
     except Exception as e:
         return f"HTTP error: {str(e)}"
 
 
+# =============================================================================
+# Shared Client Lifecycle
+# =============================================================================
+
+async def aclose_clients() -> None:
+    """Close the long-lived clients the tools opened on the running loop.
+    
+    Clients stay open across runs so connections, SQLite page caches and warm
+    Python workers are reused. Call this once on shutdown, before the loop
+    ends; the CLI does so after its run.
+    """
+    loop = asyncio.get_running_loop()
+    # Detach everything before the first await, so a run that starts while
+    # these close creates fresh clients instead of getting half-closed ones
+    tavily_client = _TAVILY_CLIENTS.pop(loop, None)
+    http_client = _HTTP_CLIENTS.pop(loop, None)
+    workers = _CODE_WORKERS.pop(loop, None)
+    sqlite_conns = _SQLITE_CONNS.pop(loop, {})
+    _SQLITE_CONNS_LOCKS.pop(loop, None)
+    
+    if tavily_client is not None:
+        await tavily_client.close()
+    
+    if http_client is not None:
+        await http_client.aclose()
+    
+    if workers is not None:
+        while not workers.empty():
+            worker = workers.get_nowait()
+            if worker is not None and worker.returncode is None:
+                # Workers exit cleanly once their stdin reaches EOF
+                worker.stdin.close()
+                await worker.wait()
+    
+    for conn, _ in sqlite_conns.values():
+        await conn.close()
+
+
 # =============================================================================
 # Tool Collections for Each Agent
 # =============================================================================
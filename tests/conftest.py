@@ -0,0 +1,7 @@
+"""Shared test configuration."""
+
+import os
+
+# The agent clients are built when src is imported and need a key to
+# construct; no test makes a real API call
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
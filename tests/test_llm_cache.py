@@ -0,0 +1,196 @@
+"""Tests for the LLM response cache."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+from src.config import config
+from src.llm_cache import LLMCache
+
+MODEL = "gpt-4o"
+MESSAGES = [HumanMessage(content="You are a helpful agent."), HumanMessage(content="What is 2 + 2?")]
+
+
+class Decision(BaseModel):
+    agent: str
+    reasoning: str
+
+
+class FakeLLM:
+    """Async stand-in for llm.ainvoke that counts its invocations."""
+
+    def __init__(self, response=None, error: Exception | None = None, delay: float = 0):
+        self.response = response if response is not None else AIMessage(content="4", id="run-1")
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class BrokenBackend:
+    async def get(self, key):
+        raise ConnectionError("backend down")
+
+    async def set(self, key, value):
+        raise ConnectionError("backend down")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(config, "llm_cache_enabled", True)
+    monkeypatch.setattr(config, "llm_cache_redis_url", "")
+    monkeypatch.setattr(config, "semantic_cache_enabled", False)
+    return LLMCache()
+
+
+async def _ainvoke(cache, llm, temperature=0, schema=None):
+    return await cache.ainvoke(llm, MESSAGES, model=MODEL, temperature=temperature, schema=schema)
+
+
+# =============================================================================
+# Exact tier
+# =============================================================================
+
+async def test_repeat_call_is_served_from_cache(cache):
+    llm = FakeLLM()
+    first = await _ainvoke(cache, llm)
+    second = await _ainvoke(cache, llm)
+
+    assert llm.calls == 1
+    assert first.content == second.content == "4"
+
+
+async def test_message_round_trip_resets_id(cache):
+    response = AIMessage(
+        content="",
+        id="run-1",
+        tool_calls=[{"name": "execute_python", "args": {"code": "print(2 + 2)"}, "id": "call-1"}]
+    )
+    llm = FakeLLM(response)
+    await _ainvoke(cache, llm)
+    cached = await _ainvoke(cache, llm)
+
+    assert llm.calls == 1
+    assert isinstance(cached, AIMessage)
+    assert cached.tool_calls == response.tool_calls
+    # A reused id would make the graph replace the earlier message
+    assert cached.id is None
+
+
+async def test_schema_response_round_trip(cache):
+    llm = FakeLLM(Decision(agent="code", reasoning="Needs a calculation"))
+    await _ainvoke(cache, llm, schema=Decision)
+    cached = await _ainvoke(cache, llm, schema=Decision)
+
+    assert llm.calls == 1
+    assert cached == Decision(agent="code", reasoning="Needs a calculation")
+
+
+async def test_sampled_calls_skip_exact_tier(cache):
+    llm = FakeLLM()
+    await _ainvoke(cache, llm, temperature=0.7)
+    await _ainvoke(cache, llm, temperature=0.7)
+    assert llm.calls == 2
+
+
+async def test_disabled_cache_always_calls(cache):
+    cache.enabled = False
+    llm = FakeLLM()
+    await _ainvoke(cache, llm)
+    await _ainvoke(cache, llm)
+    assert llm.calls == 2
+
+
+# =============================================================================
+# Failures
+# =============================================================================
+
+async def test_backend_errors_count_as_miss(cache):
+    cache._backend = BrokenBackend()
+    llm = FakeLLM()
+
+    assert (await _ainvoke(cache, llm)).content == "4"
+    assert (await _ainvoke(cache, llm)).content == "4"
+    assert llm.calls == 2
+
+
+async def test_corrupt_entry_counts_as_miss(cache):
+    key = cache.cache_key(MODEL, MESSAGES, 0)
+    await cache._backend.set(key, b"not json")
+    llm = FakeLLM()
+
+    assert (await _ainvoke(cache, llm)).content == "4"
+    assert llm.calls == 1
+
+
+async def test_failed_call_is_not_cached(cache):
+    llm = FakeLLM(error=RuntimeError("rate limited"))
+    with pytest.raises(RuntimeError):
+        await _ainvoke(cache, llm)
+
+    llm.error = None
+    assert (await _ainvoke(cache, llm)).content == "4"
+    assert llm.calls == 2
+
+
+# =============================================================================
+# Singleflight
+# =============================================================================
+
+async def test_concurrent_identical_calls_are_coalesced(cache):
+    llm = FakeLLM(delay=0.05)
+    results = await asyncio.gather(*(_ainvoke(cache, llm) for _ in range(5)))
+
+    assert llm.calls == 1
+    assert all(result.content == "4" for result in results)
+    # Followers get copies, so no two callers share a message object
+    assert len({id(result) for result in results}) == 5
+    assert not cache._inflight
+
+
+async def test_coalesced_callers_all_see_the_failure(cache):
+    llm = FakeLLM(error=RuntimeError("rate limited"), delay=0.05)
+    results = await asyncio.gather(
+        *(_ainvoke(cache, llm) for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert llm.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not cache._inflight
+
+
+async def test_follower_of_failed_task_not_yet_popped_gets_the_error(cache):
+    # The done callback that pops a task runs one loop iteration after it
+    # fails; a caller arriving in between must get the error, not hang
+    failed = asyncio.get_running_loop().create_future()
+    failed.set_exception(RuntimeError("rate limited"))
+    cache._inflight[cache.cache_key(MODEL, MESSAGES, 0)] = failed
+    llm = FakeLLM()
+
+    with pytest.raises(RuntimeError):
+        await _ainvoke(cache, llm)
+    assert llm.calls == 0
+
+
+async def test_cancelled_caller_does_not_cancel_followers(cache):
+    llm = FakeLLM(delay=0.05)
+    leader = asyncio.ensure_future(_ainvoke(cache, llm))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(_ainvoke(cache, llm))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    assert (await follower).content == "4"
+    assert llm.calls == 1
@@ -0,0 +1,52 @@
+"""Tests for assembling the response from agent events."""
+
+import pytest
+
+from src import main
+
+# Two agents dispatched in parallel after a research hop that used tools
+PARALLEL_EVENTS = [
+    ("summary", "research:1", 1, '{"agent": "research", "tool_results": []}'),
+    ("token", "files:2", 3, "The capital "),
+    ("token", "code:2", 3, "The result "),
+    ("token", "files:2", 3, "is Paris."),
+    ("token", "code:2", 3, "is 42."),
+    ("answer", "code:2", 3, "The result is 42."),
+    ("answer", "files:2", 3, "The capital is Paris."),
+]
+
+
+@pytest.fixture
+def events(monkeypatch):
+    def use(recorded):
+        async def fake_agent_events(query, verbose):
+            for event in recorded:
+                yield event
+        monkeypatch.setattr(main, "_agent_events", fake_agent_events)
+    return use
+
+
+async def test_stream_agent_does_not_interleave_parallel_runs(events):
+    events(PARALLEL_EVENTS)
+    chunks = [chunk async for chunk in main.stream_agent("query")]
+    assert "".join(chunks) == "The capital is Paris.\n\nThe result is 42."
+
+
+async def test_stream_agent_emits_cached_answers_whole(events):
+    events([("answer", "code:1", 1, "The factorial of 10 is 3628800.")])
+    assert [chunk async for chunk in main.stream_agent("query")] == ["The factorial of 10 is 3628800."]
+
+
+async def test_run_agent_returns_last_step_answers(events):
+    events([("answer", "code:1", 1, "First draft."), *PARALLEL_EVENTS])
+    assert await main.run_agent("query", verbose=False) == "The result is 42.\n\nThe capital is Paris."
+
+
+async def test_run_agent_falls_back_to_tool_summary(events):
+    events([("summary", "code:1", 1, "tool summary")])
+    assert await main.run_agent("query", verbose=False) == "tool summary"
+
+
+async def test_run_agent_without_response(events):
+    events([])
+    assert await main.run_agent("query", verbose=False) == "No response generated"
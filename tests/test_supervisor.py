@@ -0,0 +1,98 @@
+"""Tests for the supervisor's rule-based fast path."""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.supervisor import _fast_route
+
+FINAL_ANSWER = "The factorial of 10 is 3628800."
+
+
+def _fresh_state(query: str) -> dict:
+    return {
+        "messages": [HumanMessage(content=query)],
+        "next_agents": [],
+        "task_context": {"original_query": query},
+        "intermediate_results": []
+    }
+
+
+def _after_hop(agents: list[str], reply: str, results: list[dict]) -> dict:
+    return {
+        "messages": [HumanMessage(content="Calculate the factorial of 10"), AIMessage(content=reply)],
+        "next_agents": [{"agent": agent, "subtask": "..."} for agent in agents],
+        "task_context": {"original_query": "Calculate the factorial of 10"},
+        "intermediate_results": results
+    }
+
+
+def _result(agent: str, result: str) -> dict:
+    return {"agent": agent, "tool_results": [{"tool": "execute_python", "args": {}, "result": result}]}
+
+
+# =============================================================================
+# Direct routes
+# =============================================================================
+
+@pytest.mark.parametrize("query, agent", [
+    ("Calculate the factorial of 10", "code"),
+    ("SELECT name, age FROM users WHERE age > 30", "database"),
+    ("  delete from orders where id = 3", "database"),
+    ("Fetch https://api.github.com/repos/python/cpython", "api"),
+])
+def test_direct_route(query, agent):
+    next_agents, _ = _fast_route(_fresh_state(query))
+    assert next_agents == [{"agent": agent, "subtask": query}]
+
+
+@pytest.mark.parametrize("query", [
+    "Read the file src/main.py and summarize it",
+    "List the files in the project and show me setup.py",
+    "Research how to calculate compound interest",
+    "Search the web and calculate France's GDP growth",
+    "Please select one from these options",
+    "Delete from my notes the file todo.txt",
+    "What is the capital of France?",
+])
+def test_ambiguous_query_uses_router(query):
+    assert _fast_route(_fresh_state(query)) is None
+
+
+# =============================================================================
+# FINISH
+# =============================================================================
+
+def test_finish_after_successful_tool_work():
+    state = _after_hop(["code"], FINAL_ANSWER, [_result("code", "STDOUT:\n3628800")])
+    assert _fast_route(state)[0] == []
+
+
+def test_no_finish_without_own_tool_work():
+    refusal = "I don't have access to real-time data."
+    assert _fast_route(_after_hop(["code"], refusal, [])) is None
+    assert _fast_route(_after_hop(["code"], refusal, [_result("research", "Results.")])) is None
+
+
+@pytest.mark.parametrize("result", [
+    "Execution error: Python worker exited unexpectedly",
+    "Error: Code execution timed out after 30 seconds",
+    "SQL error: no such table: users",
+    "STDERR:\nTraceback (most recent call last): ...\nExit code: 1",
+])
+def test_no_finish_after_tool_error(result):
+    assert _fast_route(_after_hop(["code"], FINAL_ANSWER, [_result("code", result)])) is None
+
+
+def test_no_finish_after_raised_tool_error():
+    results = [{"agent": "code", "tool_results": [{"tool": "execute_python", "args": {}, "error": "boom"}]}]
+    assert _fast_route(_after_hop(["code"], FINAL_ANSWER, results)) is None
+
+
+def test_no_finish_after_fan_out():
+    results = [_result("code", "STDOUT:\n3628800"), _result("research", "Results.")]
+    assert _fast_route(_after_hop(["code", "research"], FINAL_ANSWER, results)) is None
+
+
+def test_no_finish_on_partial_reply():
+    state = _after_hop(["code"], "Let me check", [_result("code", "STDOUT:\n3628800")])
+    assert _fast_route(state) is None
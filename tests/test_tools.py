@@ -0,0 +1,80 @@
+"""Tests for the agent tools."""
+
+import pytest
+
+from src import tools
+from src.config import config
+
+
+@pytest.fixture(autouse=True)
+async def close_clients():
+    yield
+    await tools.aclose_clients()
+
+
+# =============================================================================
+# execute_python
+# =============================================================================
+
+async def test_execute_python_round_trip():
+    result = await tools.execute_python.ainvoke({"code": "print(6 * 7)"})
+    assert result == "STDOUT:\n42"
+
+
+async def test_execute_python_reports_errors():
+    result = await tools.execute_python.ainvoke({"code": "raise ValueError('boom')"})
+    assert "ValueError: boom" in result
+    assert "Exit code: 1" in result
+
+
+async def test_execute_python_timeout(monkeypatch):
+    monkeypatch.setattr(config, "code_execution_timeout", 1)
+    result = await tools.execute_python.ainvoke({"code": "import time; time.sleep(10)"})
+    assert result == "Error: Code execution timed out after 1 seconds"
+
+    # The worker survives the timeout and keeps serving requests
+    result = await tools.execute_python.ainvoke({"code": "print('still alive')"})
+    assert result == "STDOUT:\nstill alive"
+
+
+async def test_execute_python_isolates_snippets():
+    await tools.execute_python.ainvoke({
+        "code": "import os, sys\nos.chdir('/')\nos.environ['LEAK'] = '1'\nsys.modules['json'] = None\nx = 1"
+    })
+    result = await tools.execute_python.ainvoke({
+        "code": "import json, os\nprint(os.environ.get('LEAK'), 'x' in globals(), json.dumps(1))"
+    })
+    assert result == "STDOUT:\nNone False 1"
+
+
+async def test_execute_python_runs_as_main_module():
+    code = "import pickle\nclass Point: pass\nprint(type(pickle.loads(pickle.dumps(Point()))).__name__)"
+    result = await tools.execute_python.ainvoke({"code": code})
+    assert result == "STDOUT:\nPoint"
+
+
+async def test_execute_python_captures_subprocess_output():
+    code = "import subprocess, sys\nsubprocess.run([sys.executable, '-c', 'print(\"from child\")'])"
+    result = await tools.execute_python.ainvoke({"code": code})
+    assert result == "STDOUT:\nfrom child"
+
+
+async def test_execute_python_cannot_forge_replies():
+    code = "import json\njson.dumps = lambda *a, **k: '{}'\nprint('patched')"
+    assert await tools.execute_python.ainvoke({"code": code}) == "STDOUT:\npatched"
+    assert await tools.execute_python.ainvoke({"code": "print('next')"}) == "STDOUT:\nnext"
+
+
+# =============================================================================
+# _validate_path
+# =============================================================================
+
+def test_validate_path_rejects_sibling_prefix(tmp_path, monkeypatch):
+    allowed = tmp_path / "allowed"
+    allowed.mkdir()
+    monkeypatch.setattr(config, "allowed_file_path_abs", str(allowed))
+
+    assert tools._validate_path(str(allowed / "notes.txt")) is None
+    assert tools._validate_path(str(allowed)) is None
+    assert tools._validate_path(str(tmp_path / "allowed_evil" / "notes.txt")) is not None
+    assert tools._validate_path(str(allowed / ".." / "allowed_evil")) is not None